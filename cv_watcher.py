@@ -0,0 +1,309 @@
+"""
+Ingestão contínua de currículos em PDF a partir de uma pasta de entrada.
+
+Este script mantém um processo em execução que observa uma pasta de entrada (por polling,
+via asyncio) e pontua cada novo currículo contra um conjunto configurado de ocupações abertas,
+sem que seja necessário executar novamente `parser_curriculum.py`.
+
+Funcionamento:
+- Um observador verifica a pasta periodicamente e só enfileira um PDF quando o seu tamanho
+  estiver estável entre duas verificações (arquivo totalmente copiado).
+- A fila é limitada: quando está cheia, o observador aguarda, aplicando contrapressão.
+- Um conjunto de workers processa os PDFs em processos separados (o pré-processamento é
+  CPU-bound e não se beneficiaria de threads), extrai as skills ESCO, compara cada currículo
+  com as ocupações configuradas e move o arquivo para a pasta de processados.
+- Arquivos que falham são movidos para uma pasta de erros (dead-letter), junto com a mensagem de erro.
+- Se um processo do pool morrer (por exemplo, um PDF que derruba o interpretador), o pool é recriado
+  e cada currículo que estava em andamento é repetido sozinho em um pool novo; só vai para a pasta
+  de erros o que derrubar também esse pool isolado.
+- A latência entre a detecção do arquivo e a pontuação é exibida para cada currículo.
+
+Requisitos:
+- Os mesmos de `parser_curriculum.py`.
+
+Entradas:
+- PDFs de currículos copiados para a pasta de entrada.
+- Lista de ocupações abertas.
+
+Saídas:
+- Métricas de comparação e latência exibidas no terminal.
+- Perfis e pontuações gravados em Parquet (ver `results_store.py`), em lotes de vários
+  currículos ou a cada intervalo de tempo, para evitar muitos arquivos pequenos.
+- PDFs movidos para as pastas de processados ou de erros.
+
+Uso:
+- `python cv_watcher.py` e copie os currículos para a pasta `entrada`.
+"""
+import asyncio
+import os
+import shutil
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from parser_curriculum import (
+    extrair_texto_pdf, processar_pdf, encontrar_ocupacoes_similares, extrair_e_processar_descricoes,
+    comparar_curriculo_com_ocupacoes
+)
+from results_store import hash_curriculo, linhas_perfis, linhas_pontuacoes, gravar_perfis, gravar_pontuacoes
+from skill_matcher import carregar_matcher_skills, extrair_skills, skills_da_ocupacao
+
+
+OCUPACOES_ABERTAS = ["Analista de dados"]
+
+# Ocupações e matcher de skills carregados em cada processo do pool por `_inicializar_processo`
+_estado_processo = {"ocupacoes": {}, "matcher": None}
+
+
+def carregar_ocupacoes(nomes_ocupacoes):
+    """
+    Extrai uma única vez os tokens, stems e lemas e as skills essenciais e opcionais de cada ocupação aberta.
+
+    Retorna um dicionário nome da ocupação -> (URIs, (tokens, stems, lemas), (essenciais, opcionais)),
+    em que a primeira URI é a da ocupação alvo e as demais completam o perfil das descrições.
+    Ocupações não encontradas na base são ignoradas.
+    """
+    ocupacoes = {}
+    for nome in nomes_ocupacoes:
+        uris = encontrar_ocupacoes_similares(nome)
+        if uris:
+            ocupacoes[nome] = (
+                uris, extrair_e_processar_descricoes(nome, uris_ocupacoes=uris), skills_da_ocupacao(uris[:1])
+            )
+    return ocupacoes
+
+
+def _inicializar_processo(ocupacoes):
+    """
+    Inicializador dos processos do pool: guarda as ocupações já processadas no processo atual
+    e carrega o matcher de skills do cache em disco.
+    """
+    _estado_processo["ocupacoes"] = ocupacoes
+    _estado_processo["matcher"] = carregar_matcher_skills()
+
+
+def _criar_executor(ocupacoes, num_workers):
+    """
+    Cria o pool de processos que pontua os currículos, já inicializado com as ocupações e o matcher.
+    """
+    return ProcessPoolExecutor(max_workers=num_workers, initializer=_inicializar_processo, initargs=(ocupacoes,))
+
+
+def pontuar_curriculo(caminho_pdf, ocupacoes=None, dados_matcher=None):
+    """
+    Processa um currículo em PDF, extrai as skills ESCO e o compara com todas as ocupações carregadas.
+
+    Se `ocupacoes` ou `dados_matcher` não forem informados, usa os carregados pelo inicializador do processo.
+    Retorna um dicionário nome da ocupação -> métricas de `comparar_curriculo_com_ocupacoes`, além
+    das linhas de perfil e de pontuação a gravar no armazenamento de resultados.
+    """
+    if ocupacoes is None:
+        ocupacoes = _estado_processo["ocupacoes"]
+    if dados_matcher is None:
+        dados_matcher = _estado_processo["matcher"]
+    nome_arquivo = os.path.basename(caminho_pdf)
+    cv_hash = hash_curriculo(caminho_pdf)
+    texto = extrair_texto_pdf(caminho_pdf)
+    tokens, stems, lemas = processar_pdf(caminho_pdf, texto=texto)
+    skills_cv = extrair_skills(texto, dados_matcher)
+    perfis = linhas_perfis({nome_arquivo: {
+        "cv_hash": cv_hash, "tokens": tokens, "stems": stems, "lemmas": lemas, "skills": skills_cv
+    }})
+
+    resultados = {}
+    pontuacoes = []
+    for nome, (uris, dados_occ, skills_ocupacao) in ocupacoes.items():
+        resultados[nome] = comparar_curriculo_com_ocupacoes(
+            tokens, stems, lemas, *dados_occ, skills_cv=skills_cv, skills_ocupacao=skills_ocupacao
+        )
+        pontuacoes += linhas_pontuacoes(cv_hash, nome_arquivo, uris[0], nome, resultados[nome], ocupacoes_perfil=uris)
+    return resultados, perfis, pontuacoes
+
+
+def _mover(caminho, pasta_destino):
+    """
+    Move um arquivo para a pasta de destino, criando-a se necessário, e retorna o novo caminho.
+
+    Se já existir um arquivo com o mesmo nome no destino, é acrescentado um sufixo com a data e
+    um identificador curto, para que o arquivo anterior não seja sobrescrito.
+    """
+    os.makedirs(pasta_destino, exist_ok=True)
+    destino = os.path.join(pasta_destino, os.path.basename(caminho))
+    if os.path.exists(destino):
+        base, extensao = os.path.splitext(os.path.basename(caminho))
+        sufixo = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        destino = os.path.join(pasta_destino, f"{base}-{sufixo}{extensao}")
+    shutil.move(caminho, destino)
+    return destino
+
+
+async def gravar_lote(lote):
+    """
+    Grava no armazenamento de resultados as linhas acumuladas no lote e o esvazia.
+
+    As listas são trocadas antes da gravação, para que os workers possam continuar acumulando.
+    """
+    perfis, pontuacoes = lote["perfis"], lote["pontuacoes"]
+    if not perfis and not pontuacoes:
+        return
+    lote["perfis"], lote["pontuacoes"], lote["curriculos"] = [], [], 0
+    await asyncio.to_thread(gravar_perfis, perfis)
+    await asyncio.to_thread(gravar_pontuacoes, pontuacoes)
+
+
+async def gravar_periodicamente(lote, intervalo_gravacao):
+    """
+    Grava o lote a cada `intervalo_gravacao` segundos, mesmo que ainda não esteja cheio.
+    """
+    while True:
+        await asyncio.sleep(intervalo_gravacao)
+        await gravar_lote(lote)
+
+
+async def observar_pasta(pasta_entrada, fila, intervalo=2.0):
+    """
+    Verifica a pasta de entrada periodicamente e enfileira os PDFs novos.
+
+    Um arquivo só é enfileirado quando seu tamanho e data de modificação não mudam entre duas
+    verificações. Cada item da fila é uma tupla (caminho, instante da detecção).
+    """
+    pendentes = {}
+    enfileirados = set()
+    while True:
+        atuais = set()
+        for nome_arquivo in os.listdir(pasta_entrada):
+            if not nome_arquivo.lower().endswith('.pdf'):
+                continue
+            caminho = os.path.join(pasta_entrada, nome_arquivo)
+            atuais.add(caminho)
+            if caminho in enfileirados:
+                continue
+            try:
+                info = os.stat(caminho)
+            except FileNotFoundError:
+                continue
+
+            assinatura = (info.st_size, info.st_mtime_ns)
+            if pendentes.get(caminho, (None, None))[0] == assinatura:
+                detectado_em = pendentes.pop(caminho)[1]
+                enfileirados.add(caminho)
+                await fila.put((caminho, detectado_em))
+            elif caminho not in pendentes:
+                pendentes[caminho] = (assinatura, time.perf_counter())
+            else:
+                pendentes[caminho] = (assinatura, pendentes[caminho][1])
+
+        enfileirados &= atuais
+        for caminho in set(pendentes) - atuais:
+            del pendentes[caminho]
+        await asyncio.sleep(intervalo)
+
+
+async def pontuar_no_pool(pool, caminho):
+    """
+    Pontua um currículo no pool compartilhado, recriando-o se um dos processos tiver morrido.
+
+    Quando o pool quebra, todos os currículos em andamento falham juntos, sem indicar qual deles
+    derrubou o processo. Por isso, cada um é repetido sozinho em um pool novo de um processo: se
+    falhar de novo, a exceção é propagada e o arquivo vai para a pasta de erros.
+    """
+    loop = asyncio.get_running_loop()
+    executor = pool["executor"]
+    try:
+        return await loop.run_in_executor(executor, pontuar_curriculo, caminho)
+    except BrokenProcessPool:
+        if pool["executor"] is executor:
+            print("\n Um processo do pool foi encerrado inesperadamente. Recriando o pool.")
+            executor.shutdown(wait=False, cancel_futures=True)
+            pool["executor"] = _criar_executor(pool["ocupacoes"], pool["num_workers"])
+
+    isolado = _criar_executor(pool["ocupacoes"], 1)
+    try:
+        return await loop.run_in_executor(isolado, pontuar_curriculo, caminho)
+    finally:
+        isolado.shutdown(wait=False)
+
+
+async def worker(fila, pool, lote, tamanho_lote, pasta_processados, pasta_erros):
+    """
+    Consome a fila, pontua cada currículo em um processo do pool e move o arquivo conforme o resultado.
+
+    As linhas de resultado são acumuladas no lote, que é gravado ao atingir `tamanho_lote` currículos.
+    """
+    while True:
+        caminho, detectado_em = await fila.get()
+        nome_arquivo = os.path.basename(caminho)
+        try:
+            resultado, perfis, pontuacoes = await pontuar_no_pool(pool, caminho)
+            latencia = time.perf_counter() - detectado_em
+            lote["perfis"] += perfis
+            lote["pontuacoes"] += pontuacoes
+            lote["curriculos"] += 1
+            _mover(caminho, pasta_processados)
+            print(f"\n Currículo pontuado: {nome_arquivo} (latência: {latencia:.2f}s)")
+            for nome, metricas in resultado.items():
+                print(f" - {nome}: similaridade (lemas) {metricas['lemma']['similaridade']:.4f}, "
+                      f"cobertura (lemas) {metricas['lemma']['cobertura']:.2f}%, "
+                      f"skills essenciais {metricas['skills']['essencial']['cobertura']:.2f}%")
+        except Exception as e:
+            print(f"\n Erro ao processar {nome_arquivo}: {e}")
+            try:
+                destino = _mover(caminho, pasta_erros)
+                with open(destino + '.erro.txt', 'w', encoding='utf-8') as f:
+                    f.write(traceback.format_exc())
+            except OSError as erro_mover:
+                print(f" Não foi possível mover {nome_arquivo} para '{pasta_erros}': {erro_mover}")
+        finally:
+            fila.task_done()
+
+        if lote["curriculos"] >= tamanho_lote:
+            await gravar_lote(lote)
+
+
+async def monitorar_curriculos(ocupacoes_abertas=OCUPACOES_ABERTAS, pasta_entrada='entrada',
+                               pasta_processados='processados', pasta_erros='erros',
+                               num_workers=4, tamanho_fila=100, intervalo=2.0,
+                               tamanho_lote=200, intervalo_gravacao=60.0):
+    """
+    Executa o observador e os workers até a interrupção do processo.
+
+    As ocupações abertas são processadas uma única vez no início e repassadas a cada processo do
+    pool pelo inicializador. `tamanho_fila` limita quantos currículos podem aguardar processamento,
+    e `num_workers` define quantos processos pontuam currículos em paralelo. Os resultados são
+    gravados a cada `tamanho_lote` currículos ou a cada `intervalo_gravacao` segundos, e o que
+    restar no lote é gravado ao encerrar.
+    """
+    os.makedirs(pasta_entrada, exist_ok=True)
+    ocupacoes = carregar_ocupacoes(ocupacoes_abertas)
+    carregar_matcher_skills()  # garante o cache em disco antes de os processos do pool o lerem
+    fila = asyncio.Queue(maxsize=tamanho_fila)
+    lote = {"perfis": [], "pontuacoes": [], "curriculos": 0}
+
+    print(f"\nMonitorando a pasta '{pasta_entrada}' ({num_workers} workers, fila de {tamanho_fila}).")
+    # O pool fica em um dicionário compartilhado para que qualquer worker possa substituí-lo se ele quebrar
+    pool = {"executor": _criar_executor(ocupacoes, num_workers), "ocupacoes": ocupacoes, "num_workers": num_workers}
+    tarefas = [
+        asyncio.create_task(worker(fila, pool, lote, tamanho_lote, pasta_processados, pasta_erros))
+        for _ in range(num_workers)
+    ]
+    tarefas.append(asyncio.create_task(gravar_periodicamente(lote, intervalo_gravacao)))
+    try:
+        await observar_pasta(pasta_entrada, fila, intervalo)
+    finally:
+        for tarefa in tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*tarefas, return_exceptions=True)
+        await gravar_lote(lote)
+        pool["executor"].shutdown()
+
+
+if __name__ == "__main__":
+    """
+    Ponto de entrada do script. Monitora a pasta de entrada até ser interrompido com Ctrl+C.
+    """
+    try:
+        asyncio.run(monitorar_curriculos())
+    except KeyboardInterrupt:
+        print("\nMonitoramento encerrado.")
@@ -115,7 +115,8 @@ def main():
     Função principal que executa o fluxo de entrada do usuário, busca de ocupações e comparação com currículos.
 
     Solicita ao usuário uma ocupação, encontra URIs relacionadas, permite visualização detalhada,
-    extrai descrições e realiza a comparação com currículos PDF da pasta atual.
+    extrai descrições e realiza a comparação com currículos PDF da pasta atual. Os perfis e as
+    pontuações são gravados em lote no armazenamento de resultados (`results_store.py`).
     """
     ocupacao_input = input("Informe a ocupação que deseja consultar: ")
     ocupacao = normalizar_texto(ocupacao_input)
@@ -229,18 +230,27 @@ def main():
         return tokens, tokens_stem, tokens_lemma
 
     tokens_occ, stems_occ, lemas_occ = extrair_descricoes_por_uris(uris_escolhidas)
-    resultados_curriculos = processar_pdfs_em_pasta(".")
+    resultados_curriculos = processar_pdfs_em_pasta(".", dados_matcher=carregar_matcher_skills())
+    gravar_perfis(linhas_perfis(resultados_curriculos))
+    skills_ocupacao = skills_da_ocupacao(uris[:1])
 
+    pontuacoes = []
     for nome_arquivo, dados in resultados_curriculos.items():
         print(f"\nComparando currículo: {nome_arquivo}")
-        comparar_curriculo_com_ocupacoes(
+        resultado = comparar_curriculo_com_ocupacoes(
             dados["tokens"],
             dados["stems"],
             dados["lemmas"],
             tokens_occ,
             stems_occ,
-            lemas_occ
+            lemas_occ,
+            skills_cv=dados["skills"],
+            skills_ocupacao=skills_ocupacao
         )
+        pontuacoes += linhas_pontuacoes(
+            dados["cv_hash"], nome_arquivo, uris[0], ocupacao, resultado, ocupacoes_perfil=uris_escolhidas
+        )
+    gravar_pontuacoes(pontuacoes)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,342 @@
+"""
+Cálculo offline do grafo de similaridade entre ocupações.
+
+Este script substitui o arquivo externo similar.csv (com exatamente três colunas `UriSimilar`)
+por um grafo esparso top-k calculado a partir dos próprios perfis das ocupações. O perfil
+expandido de cada ocupação reúne as skills diretamente associadas e as skills relacionadas
+a elas (skillSkillRelations_pt.csv).
+
+A similaridade combina:
+- Jaccard entre os conjuntos de skills expandidos.
+- Similaridade de cosseno TF-IDF entre os textos das ocupações (descrição e rótulos das skills).
+
+Os produtos de matrizes esparsas são feitos em blocos de linhas, de modo que as ~3.000
+ocupações possam ser comparadas todas contra todas sem montar a matriz densa completa.
+
+Requisitos:
+- pandas, numpy, scipy, sklearn, nltk, unidecode
+
+Entradas:
+- occupations_pt.csv, occupationSkillRelations_pt.csv, skillSkillRelations_pt.csv e coleções de skills.
+
+Saídas:
+- Arquivo `occupation_similarity.npz` com as URIs, os índices e as pontuações dos k vizinhos de cada ocupação.
+
+Uso:
+- `python occupation_similarity.py` para gerar o grafo.
+- `ocupacoes_similares(uri)` para consultá-lo.
+"""
+import os
+
+import nltk
+import numpy as np
+import pandas as pd
+from nltk.corpus import stopwords
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from unidecode import unidecode
+
+
+CAMINHO_GRAFO = 'occupation_similarity.npz'
+ARQUIVOS_SKILLS = [
+    'skills_pt.csv',
+    'greenSkillsCollection_pt.csv',
+    'digCompSkillsCollection_pt.csv',
+    'languageSkillsCollection_pt.csv',
+    'transversalSkillsCollection_pt.csv',
+    'researchSkillsCollection_pt.csv',
+]
+
+_grafos_carregados = {}
+
+
+def montar_perfis_ocupacoes(pasta_csv='.', uris_alvo=None):
+    """
+    Monta o perfil expandido de cada ocupação.
+
+    Se `uris_alvo` for informado, apenas os perfis dessas ocupações são montados.
+    Retorna a lista de URIs de todas as ocupações, um dicionário URI -> conjunto de URIs de skills
+    (diretas e relacionadas) e um dicionário URI -> texto do perfil.
+    """
+    occupations = pd.read_csv(os.path.join(pasta_csv, 'occupations_pt.csv'), dtype=str).fillna('')
+    relations = pd.read_csv(os.path.join(pasta_csv, 'occupationSkillRelations_pt.csv'), dtype=str).fillna('')
+    skill_relations = pd.read_csv(os.path.join(pasta_csv, 'skillSkillRelations_pt.csv'), dtype=str).fillna('')
+    all_skills = pd.concat(
+        [pd.read_csv(os.path.join(pasta_csv, nome), dtype=str).fillna('') for nome in ARQUIVOS_SKILLS],
+        ignore_index=True
+    ).drop_duplicates('conceptUri')
+
+    rotulos = dict(zip(all_skills['conceptUri'], all_skills['preferredLabel']))
+    relacionadas = skill_relations.groupby('originalSkillUri')['relatedSkillUri'].apply(set).to_dict()
+    diretas = relations.groupby('occupationUri')['skillUri'].apply(set).to_dict()
+
+    uris = occupations['conceptUri'].tolist()
+    descricoes = dict(zip(occupations['conceptUri'], occupations['description']))
+
+    skills_por_ocupacao = {}
+    textos_por_ocupacao = {}
+    for uri in (uris if uris_alvo is None else [u for u in uris if u in uris_alvo]):
+        skills = set(diretas.get(uri, set()))
+        for skill_uri in list(skills):
+            skills |= relacionadas.get(skill_uri, set())
+        skills_por_ocupacao[uri] = skills
+
+        textos = [descricoes.get(uri, '')]
+        textos += [rotulos[s] for s in diretas.get(uri, set()) if s in rotulos]
+        textos_por_ocupacao[uri] = ' '.join(t for t in textos if t)
+
+    return uris, skills_por_ocupacao, textos_por_ocupacao
+
+
+def _matriz_skills(uris, skills_por_ocupacao):
+    """
+    Constrói a matriz esparsa binária ocupação x skill.
+    """
+    indice_skill = {}
+    linhas, colunas = [], []
+    for i, uri in enumerate(uris):
+        for skill_uri in skills_por_ocupacao[uri]:
+            j = indice_skill.setdefault(skill_uri, len(indice_skill))
+            linhas.append(i)
+            colunas.append(j)
+    dados = np.ones(len(linhas), dtype=np.float32)
+    return sparse.csr_matrix((dados, (linhas, colunas)), shape=(len(uris), max(len(indice_skill), 1)))
+
+
+def _stopwords_pt():
+    """
+    Retorna as stopwords em português sem acentuação, assim como os tokens do TF-IDF (`strip_accents`).
+
+    Baixa o corpus de stopwords do NLTK caso ainda não esteja disponível.
+    """
+    try:
+        palavras = stopwords.words('portuguese')
+    except LookupError:
+        nltk.download('stopwords')
+        palavras = stopwords.words('portuguese')
+    return sorted({unidecode(p) for p in palavras})
+
+
+def ajustar_tfidf(perfis):
+    """
+    Ajusta o TF-IDF (vocabulário e IDF) sobre os textos de todas as ocupações.
+
+    O vetorizador ajustado pode ser guardado e reutilizado em atualizações incrementais, para que
+    as pontuações das ocupações que não mudaram continuem válidas.
+    """
+    uris, _, textos_por_ocupacao = perfis
+    vectorizer = TfidfVectorizer(stop_words=_stopwords_pt(), strip_accents='unicode')
+    return vectorizer.fit([textos_por_ocupacao[uri] for uri in uris])
+
+
+def _matrizes_perfis(uris, skills_por_ocupacao, textos_por_ocupacao, vectorizer):
+    """
+    Constrói as matrizes usadas na pontuação: skills (binária), tamanho dos perfis e TF-IDF.
+    """
+    skills = _matriz_skills(uris, skills_por_ocupacao)
+    tamanhos = np.asarray(skills.sum(axis=1)).ravel()
+    tfidf = vectorizer.transform([textos_por_ocupacao[uri] for uri in uris]).astype(np.float32)
+    return skills, tamanhos, tfidf
+
+
+def _pontuar(skills, tamanhos, tfidf, linhas, colunas, peso_jaccard):
+    """
+    Calcula a matriz densa de pontuações entre as linhas e as colunas informadas.
+    """
+    intersecao = (skills[linhas] @ skills[colunas].T).toarray()
+    uniao = tamanhos[linhas, None] + tamanhos[None, colunas] - intersecao
+    jaccard = np.divide(intersecao, uniao, out=np.zeros_like(intersecao), where=uniao > 0)
+    cosseno = (tfidf[linhas] @ tfidf[colunas].T).toarray()
+    return peso_jaccard * jaccard + (1 - peso_jaccard) * cosseno
+
+
+def _top_k(bloco, k):
+    """
+    Seleciona, em ordem decrescente, os k maiores valores de cada linha de um bloco de pontuações.
+    """
+    top = np.argpartition(-bloco, k - 1, axis=1)[:, :k]
+    top_valores = np.take_along_axis(bloco, top, axis=1)
+    ordem = np.argsort(-top_valores, axis=1)
+    return np.take_along_axis(top, ordem, axis=1), np.take_along_axis(top_valores, ordem, axis=1)
+
+
+def _descartar_nulos(indices, pontuacoes):
+    """
+    Marca com índice -1 (e pontuação 0) os vizinhos sem nenhuma similaridade com a ocupação.
+
+    Sem isso, uma ocupação sem skills ou texto em comum com as demais receberia k vizinhos arbitrários.
+    """
+    nulos = pontuacoes <= 0
+    indices[nulos] = -1
+    pontuacoes[nulos] = 0
+    return indices, pontuacoes
+
+
+def _calcular_linhas(matrizes, linhas, k, peso_jaccard, tamanho_bloco):
+    """
+    Calcula os k vizinhos das ocupações em `linhas` contra todas as ocupações, em blocos.
+    """
+    skills, tamanhos, tfidf = matrizes
+    todas = np.arange(skills.shape[0])
+    indices = np.zeros((len(linhas), k), dtype=np.int32)
+    pontuacoes = np.zeros((len(linhas), k), dtype=np.float32)
+
+    for inicio in range(0, len(linhas), tamanho_bloco):
+        bloco_linhas = linhas[inicio:inicio + tamanho_bloco]
+        bloco = _pontuar(skills, tamanhos, tfidf, bloco_linhas, todas, peso_jaccard)
+        bloco[np.arange(len(bloco_linhas)), bloco_linhas] = -np.inf
+        fim = inicio + len(bloco_linhas)
+        indices[inicio:fim], pontuacoes[inicio:fim] = _top_k(bloco, k)
+
+    return _descartar_nulos(indices, pontuacoes)
+
+
+def calcular_grafo_similaridade(pasta_csv='.', k=10, peso_jaccard=0.5, tamanho_bloco=512, perfis=None,
+                                vectorizer=None):
+    """
+    Calcula o grafo top-k de similaridade entre todas as ocupações.
+
+    A pontuação é `peso_jaccard * jaccard + (1 - peso_jaccard) * cosseno_tfidf`. As linhas são
+    processadas em blocos de `tamanho_bloco` ocupações, e apenas os k maiores valores de cada
+    linha são mantidos, excluindo a própria ocupação e os valores nulos (marcados com índice -1).
+    `perfis` permite reaproveitar perfis já montados por `montar_perfis_ocupacoes`, e `vectorizer`
+    um TF-IDF já ajustado por `ajustar_tfidf` (caso contrário, ele é ajustado sobre os perfis).
+
+    Retorna a lista de URIs, a matriz de índices dos vizinhos (n x k) e a matriz de pontuações (n x k).
+    """
+    perfis = perfis or montar_perfis_ocupacoes(pasta_csv)
+    uris, skills_por_ocupacao, textos_por_ocupacao = perfis
+    k = min(k, len(uris) - 1)
+
+    matrizes = _matrizes_perfis(uris, skills_por_ocupacao, textos_por_ocupacao, vectorizer or ajustar_tfidf(perfis))
+    indices, pontuacoes = _calcular_linhas(matrizes, np.arange(len(uris)), k, peso_jaccard, tamanho_bloco)
+    return uris, indices, pontuacoes
+
+
+def atualizar_grafo_similaridade(perfis, alteradas, grafo_antigo, vectorizer, peso_jaccard=0.5, tamanho_bloco=512):
+    """
+    Atualiza o grafo top-k recalculando apenas o necessário após uma mudança na base.
+
+    `perfis` são os perfis atuais de todas as ocupações, `alteradas` o conjunto de URIs cujos perfis
+    mudaram (incluindo novas e removidas) e `grafo_antigo` o grafo carregado por `carregar_grafo_similaridade`.
+
+    As ocupações alteradas, e as que tinham alguma delas entre os vizinhos, são recalculadas contra
+    todas as demais. Para as outras, os vizinhos antigos são mantidos e comparados apenas com as
+    ocupações alteradas.
+
+    `vectorizer` deve ser o mesmo TF-IDF usado para gerar `grafo_antigo`: com o IDF fixo, as pontuações
+    entre ocupações não alteradas não mudam e o resultado é idêntico a `calcular_grafo_similaridade`
+    com esse vetorizador. Em contrapartida, termos que só aparecem nos textos novos são ignorados até
+    o próximo ajuste completo (ver `taxonomy_refresh.atualizar_taxonomia(reconstruir=True)`).
+
+    Retorna a lista de URIs, a matriz de índices dos vizinhos e a matriz de pontuações.
+    """
+    uris, skills_por_ocupacao, textos_por_ocupacao = perfis
+    k = grafo_antigo["indices"].shape[1]
+    posicao = {uri: i for i, uri in enumerate(uris)}
+    matrizes = _matrizes_perfis(uris, skills_por_ocupacao, textos_por_ocupacao, vectorizer)
+    skills, tamanhos, tfidf = matrizes
+
+    colunas_alteradas = np.array(sorted(posicao[u] for u in alteradas if u in posicao), dtype=np.int64)
+    recalcular = {posicao[u] for u in alteradas if u in posicao}
+    vizinhos_antigos = {}
+    for uri in uris:
+        i_antigo = grafo_antigo["posicao"].get(uri)
+        if uri in alteradas or i_antigo is None:
+            continue
+        vizinhos = [grafo_antigo["uris"][j] for j in grafo_antigo["indices"][i_antigo] if j >= 0]
+        if any(v in alteradas or v not in posicao for v in vizinhos):
+            recalcular.add(posicao[uri])
+        else:
+            vizinhos_antigos[posicao[uri]] = np.array([posicao[v] for v in vizinhos], dtype=np.int64)
+
+    indices = np.zeros((len(uris), k), dtype=np.int32)
+    pontuacoes = np.zeros((len(uris), k), dtype=np.float32)
+
+    linhas = np.array(sorted(recalcular), dtype=np.int64)
+    if len(linhas):
+        indices[linhas], pontuacoes[linhas] = _calcular_linhas(matrizes, linhas, k, peso_jaccard, tamanho_bloco)
+
+    mantidas = np.array(sorted(vizinhos_antigos), dtype=np.int64)
+    for inicio in range(0, len(mantidas), tamanho_bloco):
+        bloco_linhas = mantidas[inicio:inicio + tamanho_bloco]
+        candidatos = np.full((len(bloco_linhas), k), -1, dtype=np.int64)
+        valores = np.full((len(bloco_linhas), k), -np.inf, dtype=np.float32)
+        for n, i in enumerate(bloco_linhas):
+            vizinhos = vizinhos_antigos[i]
+            if len(vizinhos):
+                candidatos[n, :len(vizinhos)] = vizinhos
+                valores[n, :len(vizinhos)] = _pontuar(skills, tamanhos, tfidf, [i], vizinhos, peso_jaccard)[0]
+        if len(colunas_alteradas):
+            novas_colunas = np.broadcast_to(colunas_alteradas, (len(bloco_linhas), len(colunas_alteradas)))
+            candidatos = np.hstack([candidatos, novas_colunas])
+            valores = np.hstack([
+                valores, _pontuar(skills, tamanhos, tfidf, bloco_linhas, colunas_alteradas, peso_jaccard)
+            ])
+        top, top_valores = _top_k(valores, k)
+        indices[bloco_linhas], pontuacoes[bloco_linhas] = _descartar_nulos(
+            np.take_along_axis(candidatos, top, axis=1), top_valores
+        )
+
+    return uris, indices, pontuacoes
+
+
+def salvar_grafo_similaridade(uris, indices, pontuacoes, caminho_grafo=CAMINHO_GRAFO):
+    """
+    Persiste o grafo top-k em um arquivo .npz compacto, descartando a versão mantida em memória.
+    """
+    np.savez_compressed(caminho_grafo, uris=np.array(uris), indices=indices, pontuacoes=pontuacoes)
+    _grafos_carregados.pop(caminho_grafo, None)
+
+
+def carregar_grafo_similaridade(caminho_grafo=CAMINHO_GRAFO):
+    """
+    Carrega o grafo de similaridade do disco, mantendo-o em memória para as próximas consultas.
+
+    Retorna um dicionário com as URIs, o índice URI -> posição, os índices dos vizinhos e as pontuações,
+    ou None se o arquivo não existir.
+    """
+    if caminho_grafo in _grafos_carregados:
+        return _grafos_carregados[caminho_grafo]
+    if not os.path.exists(caminho_grafo):
+        return None
+
+    with np.load(caminho_grafo) as dados:
+        uris = dados['uris'].tolist()
+        grafo = {
+            "uris": uris,
+            "posicao": {uri: i for i, uri in enumerate(uris)},
+            "indices": dados['indices'],
+            "pontuacoes": dados['pontuacoes'],
+        }
+    _grafos_carregados[caminho_grafo] = grafo
+    return grafo
+
+
+def ocupacoes_similares(concept_uri, k=3, caminho_grafo=CAMINHO_GRAFO):
+    """
+    Retorna as k ocupações mais similares a uma ocupação, como lista de pares (URI, pontuação).
+    Vizinhos sem nenhuma similaridade não são incluídos, então a lista pode ter menos de k itens.
+
+    Retorna None se o grafo não existir e uma lista vazia se a ocupação não estiver no grafo.
+    """
+    grafo = carregar_grafo_similaridade(caminho_grafo)
+    if grafo is None:
+        return None
+
+    i = grafo["posicao"].get(concept_uri)
+    if i is None:
+        return []
+
+    vizinhos = grafo["indices"][i, :k]
+    pontuacoes = grafo["pontuacoes"][i, :k]
+    return [(grafo["uris"][j], float(p)) for j, p in zip(vizinhos, pontuacoes) if j >= 0]
+
+
+if __name__ == "__main__":
+    """
+    Ponto de entrada do script. Calcula o grafo de similaridade entre as ocupações e o salva em disco.
+    """
+    uris, indices, pontuacoes = calcular_grafo_similaridade()
+    salvar_grafo_similaridade(uris, indices, pontuacoes)
+    print(f"Grafo de similaridade salvo em '{CAMINHO_GRAFO}' ({len(uris)} ocupações, k={indices.shape[1]}).")
@@ -10,7 +10,7 @@ Objetivo:
 - Calcular similaridade e cobertura lexical entre currículos e ocupações.
 
 Requisitos:
-- nltk, spacy, pandas, sklearn, unidecode, PyPDF2
+- nltk, spacy, pandas, sklearn, unidecode, PyPDF2, pyarrow
 - Modelos de linguagem 'pt_core_news_sm' do spaCy
 
 Entradas:
@@ -18,7 +18,7 @@ Entradas:
 - Arquivos CSV com informações sobre ocupações, skills e relações
 
 Saídas:
-- Resultados salvos em JSON com tokens, stems e lemas de currículos
+- Perfis dos currículos e pontuações salvos em Parquet (ver `results_store.py`)
 - Impressão de métricas de comparação no terminal
 """
 import nltk
@@ -33,7 +33,9 @@ import os
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import re
-import json
+from occupation_similarity import ocupacoes_similares, CAMINHO_GRAFO
+from results_store import hash_curriculo, linhas_perfis, linhas_pontuacoes, gravar_perfis, gravar_pontuacoes
+from skill_matcher import carregar_matcher_skills, extrair_skills, skills_da_ocupacao, cobertura_skills
 
 # Downloads necessários para o NLTK
 nltk.download('stopwords')
@@ -99,18 +101,27 @@ def limpar_texto_curriculo(texto):
     return texto
 
 
-def processar_pdf(caminho_pdf):
+def extrair_texto_pdf(caminho_pdf):
     """
-    Lê e processa o conteúdo textual de um arquivo PDF de currículo.
-
-    Realiza extração de texto, tokenização, stemming e lematização. Retorna três listas:
-    tokens, stems e lemas.
+    Extrai o texto bruto de todas as páginas de um arquivo PDF.
     """
     with open(caminho_pdf, 'rb') as arquivo:
         leitor = PyPDF2.PdfReader(arquivo)
         texto = ""
         for pagina in leitor.pages:
             texto += pagina.extract_text()
+    return texto
+
+
+def processar_pdf(caminho_pdf, texto=None):
+    """
+    Lê e processa o conteúdo textual de um arquivo PDF de currículo.
+
+    Realiza extração de texto, tokenização, stemming e lematização. Retorna três listas:
+    tokens, stems e lemas. Se `texto` for informado, o PDF não é lido novamente.
+    """
+    if texto is None:
+        texto = extrair_texto_pdf(caminho_pdf)
 
     doc = nlp(texto)
     tokens = [token.text for token in doc if token.text.lower() not in stopwords_pt and token.is_alpha]
@@ -141,15 +152,16 @@ def processar_texto(texto):
     return tokens, stems, lemmas
 
 
-def encontrar_ocupacoes_similares(nome_ocupacao, caminho_occupations='occupations_pt.csv', caminho_similar='similar.csv'):
+def encontrar_ocupacoes_similares(nome_ocupacao, caminho_occupations='occupations_pt.csv', caminho_similar='similar.csv',
+                                  k=3, caminho_grafo=CAMINHO_GRAFO):
     """
     Encontra ocupações similares a partir do nome de uma ocupação.
 
     Normaliza o nome da ocupação, busca o conceptUri correspondente e retorna uma lista
-    de URIs incluindo similares. Exibe os nomes das ocupações encontradas.
+    de URIs incluindo as k mais similares. Usa o grafo gerado por `occupation_similarity.py`
+    quando disponível e, caso contrário, o arquivo similar.csv. Exibe os nomes das ocupações encontradas.
     """
     df_occ = pd.read_csv(caminho_occupations, quotechar='"')
-    df_similar = pd.read_csv(caminho_similar)
 
     df_occ = df_occ.fillna('').astype(str)
     nome_normalizado = re.sub(r'[^\w\s]', '', unidecode(nome_ocupacao.lower())).strip()
@@ -174,13 +186,20 @@ def encontrar_ocupacoes_similares(nome_ocupacao, caminho_occupations='occupation
         print(f"Ocupação '{nome_ocupacao}' não encontrada.")
         return []
 
-    similares = df_similar[df_similar['conceptUri'] == concept_uri]
-    if similares.empty:
+    vizinhos = ocupacoes_similares(concept_uri, k=k, caminho_grafo=caminho_grafo)
+    if vizinhos is not None:
+        similares_uris = [uri for uri, _ in vizinhos]
+    else:
+        df_similar = pd.read_csv(caminho_similar)
+        similares = df_similar[df_similar['conceptUri'] == concept_uri]
+        similares_uris = [] if similares.empty else [
+            similares.iloc[0][col] for col in df_similar.columns if col.startswith('UriSimilar')
+        ][:k]
+
+    if not similares_uris:
         print(f"Nenhuma ocupação similar encontrada para '{nome_ocupacao}'.")
         return [concept_uri]
 
-    row_sim = similares.iloc[0]
-    similares_uris = [row_sim['UriSimilar1'], row_sim['UriSimilar2'], row_sim['UriSimilar3']]
     resultado = [concept_uri] + similares_uris
     nomes_ocupacoes = df_occ[df_occ['conceptUri'].isin(resultado)]['preferredLabel'].tolist()
     print(f"\n Ocupações encontradas:")
@@ -189,12 +208,13 @@ def encontrar_ocupacoes_similares(nome_ocupacao, caminho_occupations='occupation
     return resultado
 
 
-def extrair_e_processar_descricoes(nome_ocupacao, pasta_csv='.'):
+def extrair_e_processar_descricoes(nome_ocupacao, pasta_csv='.', uris_ocupacoes=None):
     """
     Extrai descrições de ocupações e habilidades relacionadas a partir do nome de uma ocupação.
 
     Lê múltiplos arquivos CSV com dados de ocupações e skills, agrega descrições e aplica
-    tokenização, stemming e lematização sobre o texto combinado.
+    tokenização, stemming e lematização sobre o texto combinado. Se `uris_ocupacoes` for informado,
+    a busca por ocupações similares não é refeita.
     """
     occupations = pd.read_csv(os.path.join(pasta_csv, 'occupations_pt.csv'), dtype=str).fillna('')
     relations = pd.read_csv(os.path.join(pasta_csv, 'occupationSkillRelations_pt.csv'), dtype=str).fillna('')
@@ -213,7 +233,8 @@ def extrair_e_processar_descricoes(nome_ocupacao, pasta_csv='.'):
 
     all_skills = pd.concat([skills_main, green, digcomp, language, transversal, research], ignore_index=True)
 
-    uris_ocupacoes = encontrar_ocupacoes_similares(nome_ocupacao)
+    if uris_ocupacoes is None:
+        uris_ocupacoes = encontrar_ocupacoes_similares(nome_ocupacao)
 
     textos = []
 
@@ -273,12 +294,17 @@ def extrair_e_processar_descricoes(nome_ocupacao, pasta_csv='.'):
     return tokens, tokens_stem, tokens_lemma
 
 
-def comparar_curriculo_com_ocupacoes(tokens_cv, stems_cv, lemas_cv, tokens_occ, stems_occ, lemas_occ):
+def comparar_curriculo_com_ocupacoes(tokens_cv, stems_cv, lemas_cv, tokens_occ, stems_occ, lemas_occ,
+                                     skills_cv=None, skills_ocupacao=None):
     """
     Compara o conteúdo de um currículo com as descrições de uma ocupação.
 
     Usa cobertura de vocabulário e similaridade TF-IDF entre tokens, stems e lemas.
-    Exibe métricas de comparação para cada técnica de pré-processamento.
+    Exibe métricas de comparação para cada técnica de pré-processamento e retorna, para cada
+    uma, a cobertura, a similaridade e os termos em comum.
+
+    Se `skills_cv` (de `extrair_skills`) e `skills_ocupacao` (par de conjuntos essenciais e opcionais
+    de `skills_da_ocupacao`) forem informados, inclui também a cobertura de skills na chave "skills".
     """
     def comparar(texto1, texto2, label):
         set1, set2 = set(texto1), set(texto2)
@@ -295,37 +321,49 @@ def comparar_curriculo_com_ocupacoes(tokens_cv, stems_cv, lemas_cv, tokens_occ,
         print(f" Cobertura: {cobertura:.2f}%")
         print(f" Similaridade: {similaridade:.4f}")
         print(f" Interseção de palavras ({len(intersecao)}): {list(intersecao)[:10]}")
-        return cobertura, similaridade
+        return cobertura, similaridade, sorted(intersecao)
 
-    cobertura_tokens, sim_tokens = comparar(tokens_cv, tokens_occ, "Tokenização")
-    cobertura_stems, sim_stems = comparar(stems_cv, stems_occ, "Stemming")
-    cobertura_lemmas, sim_lemmas = comparar(lemas_cv, lemas_occ, "Lematização")
+    cobertura_tokens, sim_tokens, inter_tokens = comparar(tokens_cv, tokens_occ, "Tokenização")
+    cobertura_stems, sim_stems, inter_stems = comparar(stems_cv, stems_occ, "Stemming")
+    cobertura_lemmas, sim_lemmas, inter_lemmas = comparar(lemas_cv, lemas_occ, "Lematização")
 
-    return {
-        "token": {"cobertura": cobertura_tokens, "similaridade": sim_tokens},
-        "stem": {"cobertura": cobertura_stems, "similaridade": sim_stems},
-        "lemma": {"cobertura": cobertura_lemmas, "similaridade": sim_lemmas},
+    resultado = {
+        "token": {"cobertura": cobertura_tokens, "similaridade": sim_tokens, "intersecao": inter_tokens},
+        "stem": {"cobertura": cobertura_stems, "similaridade": sim_stems, "intersecao": inter_stems},
+        "lemma": {"cobertura": cobertura_lemmas, "similaridade": sim_lemmas, "intersecao": inter_lemmas},
     }
 
+    if skills_cv is not None and skills_ocupacao is not None:
+        resultado["skills"] = cobertura_skills(skills_cv, *skills_ocupacao)
+        print("\n SKILLS ESCO")
+        print(f" Cobertura essencial: {resultado['skills']['essencial']['cobertura']:.2f}%")
+        print(f" Cobertura opcional: {resultado['skills']['opcional']['cobertura']:.2f}%")
+    return resultado
+
 
-def processar_pdfs_em_pasta(pasta):
+def processar_pdfs_em_pasta(pasta, dados_matcher=None):
     """
     Processa todos os arquivos PDF de uma pasta, retornando tokens, stems e lemas para cada currículo.
 
     Aplica extração de texto e pré-processamento linguístico em lote. Retorna um dicionário com os dados
-    processados por arquivo.
+    processados por arquivo, incluindo o hash do conteúdo do PDF. Se `dados_matcher` (de
+    `carregar_matcher_skills`) for informado, inclui também as skills ESCO encontradas em cada currículo.
     """
     resultados = {}
     for nome_arquivo in os.listdir(pasta):
         if nome_arquivo.lower().endswith('.pdf'):
             caminho_pdf = os.path.join(pasta, nome_arquivo)
             print(f"\n Processando: {nome_arquivo}")
-            tokens, stems, lemas = processar_pdf(caminho_pdf)
+            texto = extrair_texto_pdf(caminho_pdf)
+            tokens, stems, lemas = processar_pdf(caminho_pdf, texto=texto)
             resultados[nome_arquivo] = {
+                "cv_hash": hash_curriculo(caminho_pdf),
                 "tokens": tokens,
                 "stems": stems,
                 "lemmas": lemas
             }
+            if dados_matcher is not None:
+                resultados[nome_arquivo]["skills"] = extrair_skills(texto, dados_matcher)
     return resultados
 
 
@@ -333,22 +371,32 @@ if __name__ == "__main__":
     """
     Ponto de entrada do script. Processa os PDFs da pasta atual, extrai e compara com ocupações.
 
-    Os resultados são salvos em um arquivo JSON e as comparações são exibidas no terminal.
+    Os perfis e as pontuações são salvos em Parquet e as comparações são exibidas no terminal.
     """
-    resultados_curriculos = processar_pdfs_em_pasta(".")
+    resultados_curriculos = processar_pdfs_em_pasta(".", dados_matcher=carregar_matcher_skills())
+    gravar_perfis(linhas_perfis(resultados_curriculos))
 
-    with open("resultados_curriculos.json", "w", encoding="utf-8") as f:
-        json.dump(resultados_curriculos, f, ensure_ascii=False, indent=4)
-
-    tokens_occ, stems_occ, lemas_occ = extrair_e_processar_descricoes("Analista de dados")
+    nome_ocupacao = "Analista de dados"
+    uris_ocupacoes = encontrar_ocupacoes_similares(nome_ocupacao)
+    tokens_occ, stems_occ, lemas_occ = extrair_e_processar_descricoes(nome_ocupacao, uris_ocupacoes=uris_ocupacoes)
+    skills_ocupacao = skills_da_ocupacao(uris_ocupacoes[:1])
 
+    pontuacoes = []
     for nome_arquivo, dados in resultados_curriculos.items():
         print(f"\n Comparando currículo: {nome_arquivo}")
-        comparar_curriculo_com_ocupacoes(
+        resultado = comparar_curriculo_com_ocupacoes(
             dados["tokens"],
             dados["stems"],
             dados["lemmas"],
             tokens_occ,
             stems_occ,
-            lemas_occ
+            lemas_occ,
+            skills_cv=dados["skills"],
+            skills_ocupacao=skills_ocupacao
         )
+        if uris_ocupacoes:
+            pontuacoes += linhas_pontuacoes(
+                dados["cv_hash"], nome_arquivo, uris_ocupacoes[0], nome_ocupacao, resultado,
+                ocupacoes_perfil=uris_ocupacoes
+            )
+    gravar_pontuacoes(pontuacoes)
@@ -0,0 +1,314 @@
+"""
+Armazenamento colunar e consulta das pontuações de currículos x ocupações.
+
+Este módulo substitui a impressão no terminal e o JSON indentado com listas de tokens por
+um armazenamento em Parquet particionado por data. São mantidos dois conjuntos de dados:
+- `pontuacoes`: uma linha por currículo, ocupação e representação (token, stem ou lemma),
+  com cobertura, similaridade e termos em comum. Quando há skills ESCO, são incluídas as
+  representações `skill_essencial` e `skill_opcional`, com a cobertura e as URIs encontradas.
+  `occupation_uri` é sempre a URI da ocupação alvo, e `ocupacoes_perfil` lista as URIs cujas
+  descrições formaram o perfil comparado.
+- `perfis`: uma linha por currículo, com os tokens, stems, lemas e URIs das skills extraídos.
+
+Os arquivos podem ser lidos diretamente pelo DuckDB ou por qualquer ferramenta compatível com
+Parquet. As funções de consulta usam o pyarrow para filtrar, ordenar e agregar sem converter as
+linhas em objetos Python.
+
+Requisitos:
+- pyarrow
+
+Entradas:
+- Resultados de `comparar_curriculo_com_ocupacoes` e representações dos currículos.
+
+Saídas:
+- Arquivos Parquet em `resultados/pontuacoes` e `resultados/perfis`.
+
+Uso:
+- `gravar_pontuacoes(linhas)` com as linhas de `linhas_pontuacoes(...)` acumuladas em lote.
+- `compactar_resultados()` (ou `python results_store.py`) para juntar arquivos pequenos de cada partição.
+- `consultar_pontuacoes(representacao='lemma', similaridade_minima=0.3, ordenar_por='similaridade')`.
+- `agregar_pontuacoes(por=['occupation_uri'])`.
+"""
+import hashlib
+import os
+import uuid
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+
+PASTA_RESULTADOS = 'resultados'
+
+SCHEMA_PONTUACOES = pa.schema([
+    ('cv_hash', pa.string()),
+    ('arquivo', pa.string()),
+    ('occupation_uri', pa.string()),
+    ('ocupacao', pa.string()),
+    ('ocupacoes_perfil', pa.list_(pa.string())),
+    ('representacao', pa.string()),
+    ('cobertura', pa.float64()),
+    ('similaridade', pa.float64()),
+    ('termos', pa.list_(pa.string())),
+    ('registrado_em', pa.timestamp('ms')),
+    ('data', pa.string()),
+])
+
+SCHEMA_PERFIS = pa.schema([
+    ('cv_hash', pa.string()),
+    ('arquivo', pa.string()),
+    ('tokens', pa.list_(pa.string())),
+    ('stems', pa.list_(pa.string())),
+    ('lemmas', pa.list_(pa.string())),
+    ('skills', pa.list_(pa.string())),
+    ('registrado_em', pa.timestamp('ms')),
+    ('data', pa.string()),
+])
+
+_PARTICIONAMENTO = ds.partitioning(pa.schema([('data', pa.string())]), flavor='hive')
+
+
+def hash_curriculo(caminho_pdf):
+    """
+    Calcula o hash SHA-256 do conteúdo de um currículo, usado para identificá-lo de forma única.
+    """
+    h = hashlib.sha256()
+    with open(caminho_pdf, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(1 << 20), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _gravar(linhas, schema, pasta):
+    """
+    Grava as linhas em um novo arquivo Parquet, dentro da partição da data de registro.
+    """
+    if not linhas:
+        return
+    tabela = pa.Table.from_pylist(linhas, schema=schema)
+    pq.write_to_dataset(
+        tabela, pasta, partitioning=_PARTICIONAMENTO,
+        basename_template=f"{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior='overwrite_or_ignore'
+    )
+
+
+def linhas_pontuacoes(cv_hash, arquivo, occupation_uri, ocupacao, resultado, ocupacoes_perfil=None):
+    """
+    Converte o resultado de `comparar_curriculo_com_ocupacoes` para um currículo e uma ocupação
+    em linhas do conjunto `pontuacoes`: uma por representação (token, stem e lemma), com cobertura,
+    similaridade e termos em comum. A cobertura de skills, se presente, gera as linhas
+    `skill_essencial` e `skill_opcional`, sem similaridade e com as URIs encontradas como termos.
+
+    `occupation_uri` é a URI da ocupação alvo. `ocupacoes_perfil` são as URIs das ocupações cujas
+    descrições compõem o perfil comparado (por padrão, apenas a ocupação alvo).
+    """
+    agora = datetime.now()
+    metricas_por_representacao = [
+        (representacao, resultado[representacao]["cobertura"], resultado[representacao]["similaridade"],
+         resultado[representacao].get("intersecao", []))
+        for representacao in ["token", "stem", "lemma"] if representacao in resultado
+    ]
+    if "skills" in resultado:
+        metricas_por_representacao += [
+            (f"skill_{tipo}", resultado["skills"][tipo]["cobertura"], None, resultado["skills"][tipo]["encontradas"])
+            for tipo in ["essencial", "opcional"]
+        ]
+
+    return [
+        {
+            "cv_hash": cv_hash,
+            "arquivo": arquivo,
+            "occupation_uri": occupation_uri,
+            "ocupacao": ocupacao,
+            "ocupacoes_perfil": list(ocupacoes_perfil or [occupation_uri]),
+            "representacao": representacao,
+            "cobertura": float(cobertura),
+            "similaridade": None if similaridade is None else float(similaridade),
+            "termos": list(termos),
+            "registrado_em": agora,
+            "data": agora.strftime('%Y-%m-%d'),
+        }
+        for representacao, cobertura, similaridade, termos in metricas_por_representacao
+    ]
+
+
+def linhas_perfis(perfis):
+    """
+    Converte perfis de currículos em linhas do conjunto `perfis`.
+
+    Recebe um dicionário nome do arquivo -> {"cv_hash", "tokens", "stems", "lemmas"} e,
+    opcionalmente, "skills" (lista de `extrair_skills`).
+    """
+    agora = datetime.now()
+    return [
+        {
+            "cv_hash": dados["cv_hash"],
+            "arquivo": arquivo,
+            "tokens": dados["tokens"],
+            "stems": dados["stems"],
+            "lemmas": dados["lemmas"],
+            "skills": [skill["uri"] for skill in dados.get("skills", [])],
+            "registrado_em": agora,
+            "data": agora.strftime('%Y-%m-%d'),
+        }
+        for arquivo, dados in perfis.items()
+    ]
+
+
+def gravar_pontuacoes(linhas, pasta_resultados=PASTA_RESULTADOS):
+    """
+    Grava um lote de linhas de `linhas_pontuacoes` em um único arquivo Parquet por partição.
+
+    Acumule as linhas de uma execução (ou de vários currículos) antes de gravar: muitos arquivos
+    pequenos tornam as consultas muito mais lentas.
+    """
+    _gravar(linhas, SCHEMA_PONTUACOES, os.path.join(pasta_resultados, 'pontuacoes'))
+
+
+def gravar_perfis(linhas, pasta_resultados=PASTA_RESULTADOS):
+    """
+    Grava um lote de linhas de `linhas_perfis` em um único arquivo Parquet por partição.
+    """
+    _gravar(linhas, SCHEMA_PERFIS, os.path.join(pasta_resultados, 'perfis'))
+
+
+def compactar_resultados(pasta_resultados=PASTA_RESULTADOS, linhas_por_arquivo=1_000_000):
+    """
+    Reescreve cada partição `data=` dos conjuntos de dados em poucos arquivos grandes.
+
+    Os novos arquivos são gravados com prefixo `_` (ignorado pelas leituras) e só são renomeados
+    depois que os arquivos antigos são removidos. Retorna o número de partições compactadas.
+    """
+    compactadas = 0
+    for nome in ['pontuacoes', 'perfis']:
+        pasta = os.path.join(pasta_resultados, nome)
+        if not os.path.isdir(pasta):
+            continue
+        for particao in sorted(os.listdir(pasta)):
+            pasta_particao = os.path.join(pasta, particao)
+            if not particao.startswith('data=') or not os.path.isdir(pasta_particao):
+                continue
+            antigos = [
+                os.path.join(pasta_particao, f) for f in os.listdir(pasta_particao)
+                if f.endswith('.parquet') and not f.startswith(('_', '.'))
+            ]
+            if len(antigos) <= 1:
+                continue
+
+            tabela = ds.dataset(antigos, format='parquet').to_table()
+            prefixo = f"compactado-{uuid.uuid4().hex}"
+            novos = []
+            for i, inicio in enumerate(range(0, tabela.num_rows, linhas_por_arquivo)):
+                temporario = os.path.join(pasta_particao, f"_{prefixo}-{i}.parquet")
+                pq.write_table(tabela.slice(inicio, linhas_por_arquivo), temporario)
+                novos.append(temporario)
+
+            for caminho in antigos:
+                os.remove(caminho)
+            for temporario in novos:
+                os.rename(temporario, os.path.join(pasta_particao, os.path.basename(temporario)[1:]))
+            compactadas += 1
+    return compactadas
+
+
+def _dataset(nome, schema, pasta_resultados):
+    """
+    Abre um dos conjuntos de dados Parquet, ou retorna None se ainda não existir.
+    """
+    pasta = os.path.join(pasta_resultados, nome)
+    if not os.path.isdir(pasta):
+        return None
+    return ds.dataset(pasta, schema=schema, format='parquet', partitioning=_PARTICIONAMENTO)
+
+
+def consultar_pontuacoes(occupation_uri=None, representacao=None, cv_hash=None, data_inicio=None, data_fim=None,
+                         similaridade_minima=None, cobertura_minima=None, colunas=None,
+                         ordenar_por=None, decrescente=True, limite=None, pasta_resultados=PASTA_RESULTADOS):
+    """
+    Consulta as pontuações armazenadas, aplicando os filtros diretamente na leitura dos arquivos Parquet.
+
+    Os filtros por data (formato AAAA-MM-DD) descartam partições inteiras. `occupation_uri` e `cv_hash`
+    aceitam um valor ou uma lista. Retorna uma `pyarrow.Table`, que pode ser convertida com `.to_pandas()`.
+    """
+    dataset = _dataset('pontuacoes', SCHEMA_PONTUACOES, pasta_resultados)
+    if dataset is None:
+        return SCHEMA_PONTUACOES.empty_table().select(colunas or SCHEMA_PONTUACOES.names)
+
+    condicoes = []
+    for campo, valor in [('occupation_uri', occupation_uri), ('cv_hash', cv_hash), ('representacao', representacao)]:
+        if valor is None:
+            continue
+        if isinstance(valor, (list, tuple, set)):
+            condicoes.append(pc.field(campo).isin(list(valor)))
+        else:
+            condicoes.append(pc.field(campo) == valor)
+    if data_inicio is not None:
+        condicoes.append(pc.field('data') >= data_inicio)
+    if data_fim is not None:
+        condicoes.append(pc.field('data') <= data_fim)
+    if similaridade_minima is not None:
+        condicoes.append(pc.field('similaridade') >= similaridade_minima)
+    if cobertura_minima is not None:
+        condicoes.append(pc.field('cobertura') >= cobertura_minima)
+
+    filtro = None
+    for condicao in condicoes:
+        filtro = condicao if filtro is None else filtro & condicao
+
+    colunas_leitura = colunas
+    if colunas is not None and ordenar_por is not None and ordenar_por not in colunas:
+        colunas_leitura = list(colunas) + [ordenar_por]
+
+    tabela = dataset.to_table(columns=colunas_leitura, filter=filtro)
+    if ordenar_por is not None:
+        tabela = tabela.sort_by([(ordenar_por, 'descending' if decrescente else 'ascending')])
+    if limite is not None:
+        tabela = tabela.slice(0, limite)
+    if colunas_leitura is not colunas:
+        tabela = tabela.select(colunas)
+    return tabela
+
+
+def agregar_pontuacoes(por=('occupation_uri', 'representacao'), pasta_resultados=PASTA_RESULTADOS, **filtros):
+    """
+    Agrega as pontuações pelas colunas informadas.
+
+    Retorna, por grupo, o número de currículos distintos e a média e o máximo de similaridade e cobertura.
+    Aceita os mesmos filtros de `consultar_pontuacoes`.
+    """
+    por = list(por)
+    tabela = consultar_pontuacoes(
+        colunas=por + ['cv_hash', 'similaridade', 'cobertura'], pasta_resultados=pasta_resultados, **filtros
+    )
+    return tabela.group_by(por).aggregate([
+        ('cv_hash', 'count_distinct'),
+        ('similaridade', 'mean'),
+        ('similaridade', 'max'),
+        ('cobertura', 'mean'),
+        ('cobertura', 'max'),
+    ])
+
+
+def consultar_perfis(cv_hash=None, colunas=None, pasta_resultados=PASTA_RESULTADOS):
+    """
+    Consulta os perfis de currículos armazenados, opcionalmente filtrando por um ou mais hashes.
+    """
+    dataset = _dataset('perfis', SCHEMA_PERFIS, pasta_resultados)
+    if dataset is None:
+        return SCHEMA_PERFIS.empty_table().select(colunas or SCHEMA_PERFIS.names)
+
+    filtro = None
+    if cv_hash is not None:
+        valores = list(cv_hash) if isinstance(cv_hash, (list, tuple, set)) else [cv_hash]
+        filtro = pc.field('cv_hash').isin(valores)
+    return dataset.to_table(columns=colunas, filter=filtro)
+
+
+if __name__ == "__main__":
+    """
+    Ponto de entrada do script. Compacta as partições do armazenamento de resultados.
+    """
+    print(f"Partições compactadas: {compactar_resultados()}")
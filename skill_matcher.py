@@ -0,0 +1,326 @@
+"""
+Extração explícita de skills ESCO a partir do texto de currículos.
+
+Este módulo compila todos os rótulos (preferredLabel e altLabels) das skills ESCO em um
+PhraseMatcher do spaCy, que é construído uma única vez e mantido em cache no disco. O texto
+de cada currículo é percorrido uma só vez pelo matcher, e cada ocorrência é convertida na URI
+da skill correspondente, acompanhada do grupo, do pilar e do nível hierárquico.
+
+Objetivo:
+- Substituir a comparação por "saco de palavras" por um sinal explícito de skills.
+- Calcular a cobertura das skills essenciais e opcionais de uma ocupação com base em
+  occupationSkillRelations_pt.csv.
+
+Requisitos:
+- spacy, pandas, unidecode
+
+Entradas:
+- Arquivos CSV de skills, grupos, pilares, hierarquia e relações ocupação-skill.
+- Texto bruto de currículos (ou PDFs, via `parser_curriculum.py`).
+
+As skills são extraídas em `parser_curriculum.processar_pdfs_em_pasta` (e em `cv_watcher.py`), e a
+cobertura é calculada em `comparar_curriculo_com_ocupacoes` junto com as demais métricas.
+
+Saídas:
+- Lista de skills encontradas por currículo, com URI, rótulo, grupo, pilar e nível hierárquico.
+- Cobertura de skills essenciais e opcionais por ocupação.
+
+Uso:
+- `matcher = carregar_matcher_skills()` e depois `extrair_skills(texto, matcher)`.
+"""
+import hashlib
+import os
+import pickle
+import re
+
+import pandas as pd
+import spacy
+from spacy.matcher import PhraseMatcher
+from unidecode import unidecode
+
+
+ARQUIVOS_SKILLS = [
+    'skills_pt.csv',
+    'greenSkillsCollection_pt.csv',
+    'digCompSkillsCollection_pt.csv',
+    'languageSkillsCollection_pt.csv',
+    'transversalSkillsCollection_pt.csv',
+    'researchSkillsCollection_pt.csv',
+]
+ARQUIVOS_METADADOS = [
+    'skillGroups_pt.csv',
+    'broaderRelationsSkillPillar_pt.csv',
+    'skillsHierarchy_pt.csv',
+]
+CAMINHO_CACHE = 'skill_matcher.pkl'
+
+
+def normalizar_rotulo(texto):
+    """
+    Normaliza um rótulo ou texto para o matching: minúsculas, sem acentos e sem pontuação.
+
+    Rótulos das skills e texto dos currículos passam pela mesma normalização, para que
+    variações de acentuação e caixa não impeçam a correspondência.
+    """
+    texto = unidecode(str(texto).lower())
+    texto = re.sub(r'[^\w\s]', ' ', texto)
+    return re.sub(r'\s+', ' ', texto).strip()
+
+
+def _assinatura_csvs(pasta_csv):
+    """
+    Calcula uma assinatura dos CSVs usados pelo matcher a partir de nome, tamanho e data de modificação.
+
+    Usada para invalidar o cache em disco quando a base ESCO é atualizada.
+    """
+    h = hashlib.sha1()
+    for nome in ARQUIVOS_SKILLS + ARQUIVOS_METADADOS:
+        caminho = os.path.join(pasta_csv, nome)
+        if os.path.exists(caminho):
+            info = os.stat(caminho)
+            h.update(f"{nome}:{info.st_size}:{info.st_mtime_ns}".encode('utf-8'))
+    return h.hexdigest()
+
+
+def _metadados_skills(pasta_csv, all_skills):
+    """
+    Monta um dicionário URI -> {rótulo, grupo, pilar, nível} para todas as skills.
+
+    O grupo é o primeiro ancestral da skill (seguindo broaderRelationsSkillPillar_pt.csv) que seja
+    um grupo de skills. A subida continua até um nó presente em skillsHierarchy_pt.csv, que fornece
+    o nível hierárquico e o pilar (Level 0) da skill.
+    """
+    skill_groups = pd.read_csv(os.path.join(pasta_csv, 'skillGroups_pt.csv'), dtype=str).fillna('')
+    broader_pillars = pd.read_csv(os.path.join(pasta_csv, 'broaderRelationsSkillPillar_pt.csv'), dtype=str).fillna('')
+    skills_hierarchy = pd.read_csv(os.path.join(pasta_csv, 'skillsHierarchy_pt.csv'), dtype=str).fillna('')
+
+    rotulos = dict(zip(all_skills['conceptUri'], all_skills['preferredLabel']))
+    rotulos.update(dict(zip(skill_groups['conceptUri'], skill_groups['preferredLabel'])))
+    pais = broader_pillars.drop_duplicates('conceptUri')
+    pais = dict(zip(pais['conceptUri'], pais['broaderUri']))
+
+    niveis = {}
+    pilares = {}
+    for nivel in ['0', '1', '2', '3']:
+        coluna_uri = f'Level {nivel} URI'
+        coluna_rotulo = f'Level {nivel} preferred term'
+        for _, row in skills_hierarchy.iterrows():
+            uri = row[coluna_uri]
+            if not uri or uri in niveis:
+                continue
+            niveis[uri] = nivel
+            pilares[uri] = row['Level 0 URI']
+            if row.get(coluna_rotulo) and uri not in rotulos:
+                rotulos[uri] = row[coluna_rotulo]
+    uris_grupos = set(skill_groups['conceptUri']) | set(niveis)
+
+    metadados = {}
+    for uri in all_skills['conceptUri']:
+        grupo, nivel, pilar = '', None, ''
+        no, visitados = pais.get(uri), {uri}
+        while no and no not in visitados:
+            visitados.add(no)
+            if not grupo and no in uris_grupos:
+                grupo = rotulos.get(no, '')
+            if no in niveis:
+                nivel = niveis[no]
+                pilar = rotulos.get(pilares[no], '')
+                break
+            no = pais.get(no)
+
+        metadados[uri] = {
+            "uri": uri,
+            "label": rotulos.get(uri, ''),
+            "grupo": grupo,
+            "pilar": pilar,
+            "nivel": nivel,
+        }
+    return metadados
+
+
+def _ler_skills(pasta_csv):
+    """
+    Lê e concatena todas as coleções de skills, sem URIs repetidas.
+    """
+    return pd.concat(
+        [pd.read_csv(os.path.join(pasta_csv, nome), dtype=str).fillna('') for nome in ARQUIVOS_SKILLS],
+        ignore_index=True
+    ).drop_duplicates('conceptUri')
+
+
+def _adicionar_padroes(nlp_matcher, matcher, skills):
+    """
+    Registra no matcher os rótulos normalizados (preferredLabel e altLabels) de cada skill.
+    """
+    for _, row in skills.iterrows():
+        rotulos = [row['preferredLabel']]
+        if 'altLabels' in row:
+            rotulos += row['altLabels'].split('\n')
+        rotulos = {normalizar_rotulo(r) for r in rotulos if r.strip()}
+        padroes = [nlp_matcher.make_doc(r) for r in rotulos if r]
+        if padroes:
+            matcher.add(row['conceptUri'], padroes)
+
+
+def construir_matcher_skills(pasta_csv='.'):
+    """
+    Compila todos os rótulos das skills ESCO em um PhraseMatcher do spaCy.
+
+    Cada preferredLabel e altLabel é normalizado e registrado sob a URI da skill.
+    Retorna um dicionário com o pipeline de tokenização, o matcher e os metadados das skills.
+    """
+    all_skills = _ler_skills(pasta_csv)
+
+    nlp_matcher = spacy.blank('pt')
+    matcher = PhraseMatcher(nlp_matcher.vocab)
+    _adicionar_padroes(nlp_matcher, matcher, all_skills)
+
+    return {
+        "assinatura": _assinatura_csvs(pasta_csv),
+        "nlp": nlp_matcher,
+        "matcher": matcher,
+        "skills": _metadados_skills(pasta_csv, all_skills),
+    }
+
+
+def atualizar_matcher_skills(dados_matcher, uris_alteradas, pasta_csv='.', caminho_cache=CAMINHO_CACHE):
+    """
+    Atualiza o matcher apenas para as skills informadas, sem recompilar todos os rótulos.
+
+    Os padrões das skills alteradas ou removidas são retirados do matcher e os das skills
+    atuais são registrados novamente. Os metadados são remontados e o cache é salvo.
+    """
+    all_skills = _ler_skills(pasta_csv)
+    matcher = dados_matcher["matcher"]
+
+    for uri in uris_alteradas:
+        if uri in matcher:
+            matcher.remove(uri)
+    _adicionar_padroes(dados_matcher["nlp"], matcher, all_skills[all_skills['conceptUri'].isin(uris_alteradas)])
+
+    dados_matcher["skills"] = _metadados_skills(pasta_csv, all_skills)
+    dados_matcher["assinatura"] = _assinatura_csvs(pasta_csv)
+    with open(caminho_cache, 'wb') as f:
+        pickle.dump(dados_matcher, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return dados_matcher
+
+
+def carregar_matcher_skills(pasta_csv='.', caminho_cache=CAMINHO_CACHE):
+    """
+    Carrega o matcher de skills do cache em disco, reconstruindo-o se os CSVs mudaram.
+
+    O cache é validado pela assinatura dos CSVs; se estiver ausente ou desatualizado,
+    o matcher é compilado novamente e salvo.
+    """
+    assinatura = _assinatura_csvs(pasta_csv)
+    if os.path.exists(caminho_cache):
+        with open(caminho_cache, 'rb') as f:
+            dados = pickle.load(f)
+        if dados.get("assinatura") == assinatura:
+            return dados
+
+    dados = construir_matcher_skills(pasta_csv)
+    with open(caminho_cache, 'wb') as f:
+        pickle.dump(dados, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return dados
+
+
+def _skills_do_doc(doc, dados_matcher):
+    """
+    Converte as ocorrências do matcher em um documento na lista de skills encontradas (sem repetição).
+    """
+    vocab = dados_matcher["nlp"].vocab
+    skills = dados_matcher["skills"]
+    encontradas = {}
+    for match_id, inicio, fim in dados_matcher["matcher"](doc):
+        uri = vocab.strings[match_id]
+        if uri not in encontradas:
+            skill = dict(skills.get(uri, {"uri": uri, "label": '', "grupo": '', "pilar": '', "nivel": None}))
+            skill["trecho"] = doc[inicio:fim].text
+            encontradas[uri] = skill
+    return list(encontradas.values())
+
+
+def extrair_skills(texto, dados_matcher):
+    """
+    Extrai as skills ESCO presentes no texto de um currículo.
+
+    Retorna uma lista de dicionários com uri, label, grupo, pilar, nivel e o trecho encontrado.
+    """
+    doc = dados_matcher["nlp"].make_doc(normalizar_rotulo(texto))
+    return _skills_do_doc(doc, dados_matcher)
+
+
+def extrair_skills_em_lote(textos, dados_matcher, batch_size=256):
+    """
+    Extrai as skills ESCO de vários currículos de uma só vez.
+
+    Recebe um dicionário nome -> texto e usa `nlp.pipe` para tokenizar em lote.
+    Retorna um dicionário nome -> lista de skills.
+    """
+    nomes = list(textos)
+    docs = dados_matcher["nlp"].pipe((normalizar_rotulo(textos[n]) for n in nomes), batch_size=batch_size)
+    return {nome: _skills_do_doc(doc, dados_matcher) for nome, doc in zip(nomes, docs)}
+
+
+def skills_da_ocupacao(uris_ocupacoes, pasta_csv='.'):
+    """
+    Retorna os conjuntos de URIs de skills essenciais e opcionais das ocupações informadas.
+
+    Lê occupationSkillRelations_pt.csv e separa as skills pelo campo relationType.
+    """
+    relations = pd.read_csv(os.path.join(pasta_csv, 'occupationSkillRelations_pt.csv'), dtype=str).fillna('')
+    relations = relations[relations['occupationUri'].isin(uris_ocupacoes)]
+    essenciais = set(relations[relations['relationType'] == 'essential']['skillUri'])
+    opcionais = set(relations[relations['relationType'] == 'optional']['skillUri']) - essenciais
+    return essenciais, opcionais
+
+
+def cobertura_skills(skills_cv, essenciais, opcionais):
+    """
+    Calcula a cobertura das skills essenciais e opcionais de uma ocupação por um currículo.
+
+    Retorna um dicionário com as coberturas percentuais e as URIs encontradas e faltantes.
+    """
+    uris_cv = {s["uri"] for s in skills_cv}
+    encontradas_ess = uris_cv & essenciais
+    encontradas_opc = uris_cv & opcionais
+    return {
+        "essencial": {
+            "cobertura": len(encontradas_ess) / len(essenciais) * 100 if essenciais else 0,
+            "encontradas": sorted(encontradas_ess),
+            "faltantes": sorted(essenciais - encontradas_ess),
+        },
+        "opcional": {
+            "cobertura": len(encontradas_opc) / len(opcionais) * 100 if opcionais else 0,
+            "encontradas": sorted(encontradas_opc),
+            "faltantes": sorted(opcionais - encontradas_opc),
+        },
+    }
+
+
+if __name__ == "__main__":
+    """
+    Ponto de entrada do script. Extrai as skills dos PDFs da pasta atual e calcula a cobertura
+    em relação a uma ocupação de exemplo.
+    """
+    from parser_curriculum import encontrar_ocupacoes_similares, extrair_texto_pdf
+
+    dados_matcher = carregar_matcher_skills()
+
+    textos = {
+        nome_arquivo: extrair_texto_pdf(nome_arquivo)
+        for nome_arquivo in os.listdir('.') if nome_arquivo.lower().endswith('.pdf')
+    }
+
+    skills_por_cv = extrair_skills_em_lote(textos, dados_matcher)
+    uris_ocupacoes = encontrar_ocupacoes_similares("Analista de dados")
+    essenciais, opcionais = skills_da_ocupacao(uris_ocupacoes[:1])
+
+    for nome_arquivo, skills_cv in skills_por_cv.items():
+        print(f"\n Skills encontradas em: {nome_arquivo} ({len(skills_cv)})")
+        for skill in skills_cv[:10]:
+            print(f" - {skill['label']} | Grupo: {skill['grupo']} | Pilar: {skill['pilar']} | Nível: {skill['nivel']}")
+        cobertura = cobertura_skills(skills_cv, essenciais, opcionais)
+        print(f" Cobertura essencial: {cobertura['essencial']['cobertura']:.2f}%")
+        print(f" Cobertura opcional: {cobertura['opcional']['cobertura']:.2f}%")
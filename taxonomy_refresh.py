@@ -0,0 +1,246 @@
+"""
+Atualização incremental dos artefatos derivados quando os CSVs da ESCO são atualizados.
+
+Quando uma nova versão da ESCO é publicada, os perfis das ocupações, o grafo de similaridade
+(`occupation_similarity.py`) e o matcher de skills (`skill_matcher.py`) precisariam ser
+reconstruídos do zero. Este script compara os novos CSVs com o snapshot armazenado, por
+conceptUri e hash do conteúdo, e recalcula apenas o que foi afetado.
+
+Uma ocupação é considerada alterada quando muda:
+- a própria linha em occupations_pt.csv;
+- o seu conjunto de relações em occupationSkillRelations_pt.csv;
+- alguma de suas skills (coleções de skills, grupos, pilares ou hierarquia);
+- as skills relacionadas de alguma de suas skills (skillSkillRelations_pt.csv).
+
+Requisitos:
+- pandas, numpy, scipy, sklearn, spacy
+
+Entradas:
+- Pasta com os CSVs da ESCO (nova versão).
+- Snapshot `esco_snapshot.pkl` gerado na execução anterior (hashes, perfis e o TF-IDF ajustado).
+
+Saídas:
+- Grafo de similaridade, cache do matcher de skills e snapshot atualizados.
+- Relatório no console com o que mudou em cada arquivo e as ocupações recalculadas.
+
+Uso:
+- `python taxonomy_refresh.py` após substituir os CSVs da pasta atual.
+- `python taxonomy_refresh.py --completo` para reconstruir tudo e reajustar o TF-IDF. As execuções
+  incrementais mantêm o vocabulário e o IDF da última reconstrução completa, então termos novos só
+  passam a contar na similaridade textual após uma reconstrução completa.
+"""
+import hashlib
+import os
+import pickle
+import sys
+
+import pandas as pd
+
+from occupation_similarity import (
+    CAMINHO_GRAFO, montar_perfis_ocupacoes, ajustar_tfidf, calcular_grafo_similaridade, atualizar_grafo_similaridade,
+    carregar_grafo_similaridade, salvar_grafo_similaridade
+)
+from skill_matcher import ARQUIVOS_SKILLS, CAMINHO_CACHE, construir_matcher_skills, atualizar_matcher_skills
+
+
+CAMINHO_SNAPSHOT = 'esco_snapshot.pkl'
+
+# Arquivo -> coluna usada como chave ao calcular os hashes de conteúdo
+CHAVES_ARQUIVOS = {
+    'occupations_pt.csv': 'conceptUri',
+    'occupationSkillRelations_pt.csv': 'occupationUri',
+    'skillGroups_pt.csv': 'conceptUri',
+    'skillSkillRelations_pt.csv': 'originalSkillUri',
+    'broaderRelationsSkillPillar_pt.csv': 'conceptUri',
+    'skillsHierarchy_pt.csv': 'conceptUri',
+}
+CHAVES_ARQUIVOS.update({nome: 'conceptUri' for nome in ARQUIVOS_SKILLS})
+
+
+def _ler_para_hash(pasta_csv, nome):
+    """
+    Lê um CSV para o cálculo dos hashes.
+
+    A hierarquia de skills é convertida em pares (conceptUri, nível), já que uma mesma skill
+    aparece em várias colunas `Level N URI`.
+    """
+    df = pd.read_csv(os.path.join(pasta_csv, nome), dtype=str).fillna('')
+    if nome != 'skillsHierarchy_pt.csv':
+        return df
+
+    niveis = [
+        pd.DataFrame({'conceptUri': df[col], 'nivel': col.split()[1]})
+        for col in ['Level 0 URI', 'Level 1 URI', 'Level 2 URI', 'Level 3 URI']
+    ]
+    niveis = pd.concat(niveis, ignore_index=True)
+    return niveis[niveis['conceptUri'] != '']
+
+
+def calcular_hashes(pasta_csv='.'):
+    """
+    Calcula, para cada CSV, um dicionário chave -> hash do conteúdo de todas as linhas com aquela chave.
+
+    As linhas são ordenadas antes do hash, de modo que a ordem no arquivo não gere falsas alterações.
+    """
+    hashes = {}
+    for nome, chave in CHAVES_ARQUIVOS.items():
+        df = _ler_para_hash(pasta_csv, nome)
+        colunas = sorted(df.columns)
+        linhas = df[colunas].astype(str).agg('\x1f'.join, axis=1)
+        hashes[nome] = {
+            valor: hashlib.sha1('\x1e'.join(sorted(grupo)).encode('utf-8')).hexdigest()
+            for valor, grupo in linhas.groupby(df[chave])
+        }
+    return hashes
+
+
+def comparar_hashes(antigos, novos):
+    """
+    Compara dois dicionários de hashes arquivo a arquivo.
+
+    Retorna um dicionário arquivo -> {"adicionadas", "removidas", "modificadas"} com as chaves de cada caso.
+    """
+    diferencas = {}
+    for nome in CHAVES_ARQUIVOS:
+        a, n = antigos.get(nome, {}), novos.get(nome, {})
+        diferencas[nome] = {
+            "adicionadas": set(n) - set(a),
+            "removidas": set(a) - set(n),
+            "modificadas": {k for k in set(a) & set(n) if a[k] != n[k]},
+        }
+    return diferencas
+
+
+def _alteradas(diferenca):
+    """
+    Retorna todas as chaves adicionadas, removidas ou modificadas de um arquivo.
+    """
+    return diferenca["adicionadas"] | diferenca["removidas"] | diferenca["modificadas"]
+
+
+def ocupacoes_afetadas(diferencas, pasta_csv='.'):
+    """
+    Determina as skills e as ocupações afetadas pelas diferenças entre as versões.
+
+    Retorna o conjunto de URIs de skills alteradas nas coleções de skills (que exigem atualizar o
+    matcher) e o conjunto de URIs de ocupações cujos perfis precisam ser recalculados.
+    """
+    skills_colecoes = set()
+    for nome in ARQUIVOS_SKILLS:
+        skills_colecoes |= _alteradas(diferencas[nome])
+
+    skills_alteradas = set(skills_colecoes)
+    for nome in ['skillGroups_pt.csv', 'skillSkillRelations_pt.csv',
+                 'broaderRelationsSkillPillar_pt.csv', 'skillsHierarchy_pt.csv']:
+        skills_alteradas |= _alteradas(diferencas[nome])
+
+    ocupacoes = _alteradas(diferencas['occupations_pt.csv']) | _alteradas(diferencas['occupationSkillRelations_pt.csv'])
+    if skills_alteradas:
+        relations = pd.read_csv(os.path.join(pasta_csv, 'occupationSkillRelations_pt.csv'), dtype=str).fillna('')
+        ocupacoes |= set(relations[relations['skillUri'].isin(skills_alteradas)]['occupationUri'])
+
+    return skills_colecoes, ocupacoes
+
+
+def exibir_relatorio(diferencas, skills_colecoes, ocupacoes, completo=False):
+    """
+    Exibe no console o resumo das alterações encontradas e do que foi recalculado.
+    """
+    print("\n=== ALTERAÇÕES NA BASE ESCO ===")
+    for nome, diferenca in diferencas.items():
+        if _alteradas(diferenca):
+            print(f" {nome}: {len(diferenca['adicionadas'])} adicionadas, "
+                  f"{len(diferenca['removidas'])} removidas, {len(diferenca['modificadas'])} modificadas")
+    print(f"\n Skills recompiladas no matcher: {len(skills_colecoes)}")
+    print(f" Ocupações recalculadas: {len(ocupacoes)}")
+    if completo:
+        print(" Modo: reconstrução completa (TF-IDF reajustado sobre todas as ocupações).")
+    else:
+        print(" Modo: incremental (TF-IDF da última reconstrução completa; termos novos são ignorados"
+              " até a próxima, com `python taxonomy_refresh.py --completo`).")
+
+
+def _salvar_pickle(objeto, caminho):
+    """
+    Grava um objeto em disco com pickle.
+    """
+    with open(caminho, 'wb') as f:
+        pickle.dump(objeto, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def atualizar_taxonomia(pasta_csv='.', caminho_snapshot=CAMINHO_SNAPSHOT, caminho_grafo=CAMINHO_GRAFO,
+                        caminho_cache=CAMINHO_CACHE, reconstruir=False):
+    """
+    Atualiza os perfis, o grafo de similaridade e o matcher de skills a partir dos CSVs atuais.
+
+    Sem snapshot anterior, ou com `reconstruir=True`, todos os artefatos são gerados do zero e o
+    TF-IDF é reajustado. Caso contrário, apenas as ocupações e skills afetadas são recalculadas,
+    reutilizando o TF-IDF guardado no snapshot: o grafo fica idêntico ao de uma reconstrução com
+    esse mesmo TF-IDF, mas termos que só existem na nova versão não contam até a próxima
+    reconstrução completa. Retorna um dicionário com as diferenças por arquivo, as skills e as
+    ocupações recalculadas.
+    """
+    hashes = calcular_hashes(pasta_csv)
+    snapshot = None
+    if os.path.exists(caminho_snapshot) and not reconstruir:
+        with open(caminho_snapshot, 'rb') as f:
+            snapshot = pickle.load(f)
+        if "vectorizer" not in snapshot:
+            print("Snapshot sem TF-IDF ajustado (versão anterior). Gerando todos os artefatos do zero.")
+            snapshot = None
+    elif not reconstruir:
+        print("Nenhum snapshot encontrado. Gerando todos os artefatos do zero.")
+
+    if snapshot is None:
+        perfis = montar_perfis_ocupacoes(pasta_csv)
+        vectorizer = ajustar_tfidf(perfis)
+        diferencas = comparar_hashes({}, hashes)
+        skills_colecoes, ocupacoes = set(), set(perfis[0])
+        exibir_relatorio(diferencas, skills_colecoes, ocupacoes, completo=True)
+
+        resultado = calcular_grafo_similaridade(pasta_csv, perfis=perfis, vectorizer=vectorizer)
+        salvar_grafo_similaridade(*resultado, caminho_grafo=caminho_grafo)
+        _salvar_pickle(construir_matcher_skills(pasta_csv), caminho_cache)
+        _salvar_pickle({"hashes": hashes, "perfis": perfis, "vectorizer": vectorizer}, caminho_snapshot)
+        return {"diferencas": diferencas, "skills": skills_colecoes, "ocupacoes": ocupacoes}
+
+    diferencas = comparar_hashes(snapshot["hashes"], hashes)
+    skills_colecoes, ocupacoes = ocupacoes_afetadas(diferencas, pasta_csv)
+    exibir_relatorio(diferencas, skills_colecoes, ocupacoes)
+    vectorizer = snapshot["vectorizer"]
+
+    if not ocupacoes:
+        print("\nNenhuma ocupação alterada. Grafo de similaridade mantido.")
+    else:
+        uris, novos_skills, novos_textos = montar_perfis_ocupacoes(pasta_csv, uris_alvo=ocupacoes)
+        _, skills_antigos, textos_antigos = snapshot["perfis"]
+        skills_por_ocupacao = {u: novos_skills.get(u, skills_antigos.get(u, set())) for u in uris}
+        textos_por_ocupacao = {u: novos_textos.get(u, textos_antigos.get(u, '')) for u in uris}
+        snapshot["perfis"] = (uris, skills_por_ocupacao, textos_por_ocupacao)
+
+        grafo = carregar_grafo_similaridade(caminho_grafo)
+        if grafo is None:
+            resultado = calcular_grafo_similaridade(pasta_csv, perfis=snapshot["perfis"], vectorizer=vectorizer)
+        else:
+            resultado = atualizar_grafo_similaridade(snapshot["perfis"], ocupacoes, grafo, vectorizer)
+        salvar_grafo_similaridade(*resultado, caminho_grafo=caminho_grafo)
+
+    # Mesmo sem skills alteradas, os metadados (grupos, pilares, hierarquia) e a assinatura do cache
+    # precisam refletir os CSVs atuais, ou o matcher seria reconstruído do zero no próximo carregamento
+    if os.path.exists(caminho_cache):
+        with open(caminho_cache, 'rb') as f:
+            atualizar_matcher_skills(pickle.load(f), skills_colecoes, pasta_csv, caminho_cache)
+    else:
+        _salvar_pickle(construir_matcher_skills(pasta_csv), caminho_cache)
+
+    snapshot["hashes"] = hashes
+    _salvar_pickle(snapshot, caminho_snapshot)
+    return {"diferencas": diferencas, "skills": skills_colecoes, "ocupacoes": ocupacoes}
+
+
+if __name__ == "__main__":
+    """
+    Ponto de entrada do script. Compara os CSVs da pasta atual com o snapshot e atualiza os artefatos.
+    Com `--completo`, ignora o snapshot e reconstrói tudo, reajustando o TF-IDF.
+    """
+    atualizar_taxonomia(reconstruir='--completo' in sys.argv[1:])